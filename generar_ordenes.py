@@ -6,17 +6,39 @@
 
 from pathlib import Path
 from typing import List
+import os
 import re
 
 import pandas as pd
+from pandas.api.types import is_scalar
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+# Lectura de CSV y claves de cruce compartidas; las rutas se siguen exponiendo aquí
+# para usos existentes
+from io_datos import (  # noqa: F401
+    INVENTARIO_FILE,
+    PEDIDOS_FILE,
+    claves_categoricas,
+    leer_inventario_csv,
+    leer_pedidos_csv,
+)
+
+try:  # xlsxwriter es opcional: motor alternativo de Excel en modo constant_memory
+    import xlsxwriter
+except ImportError:  # pragma: no cover - sin xlsxwriter sólo queda openpyxl
+    xlsxwriter = None
 
 # Configuración de rutas
 BASE_DIR = Path(__file__).resolve().parent
-PEDIDOS_FILE = BASE_DIR / "data" / "pedidos.csv"
-INVENTARIO_FILE = BASE_DIR / "data" / "inventario.csv"
 OUTPUT_DIR = BASE_DIR / "data" / "ordenesc"
 OUTPUT_FILE = OUTPUT_DIR / "ordenes_proveedor.xlsx"
 
+# Motor de escritura del Excel; se puede cambiar con la variable de entorno
+# ORDENES_EXCEL_ENGINE ('openpyxl' o 'xlsxwriter')
+EXCEL_ENGINE = os.environ.get("ORDENES_EXCEL_ENGINE", "openpyxl")
+
 # Columnas esperadas
 COLS_PEDIDOS_REQUERIDAS: List[str] = [
     "Lineitem sku",
@@ -25,17 +47,37 @@ COLS_PEDIDOS_REQUERIDAS: List[str] = [
     "Lineitem quantity",
 ]
 
+# Claves de agrupación repetidas que se cargan como categóricas. 'Billing Name' queda
+# como texto: sólo se agrega como lista de clientes y agg(list) no admite categóricas
+COLS_CATEGORICAS_PEDIDOS = ("Lineitem sku", "Vendor")
+
+# Caracteres no permitidos en nombres de hoja de Excel (regex precompilada)
+_SHEET_BAD = re.compile(r"[:\\/\?\*\[\]]")
+
 def _normalizar_columnas(df: pd.DataFrame) -> pd.DataFrame:
     # Limpia espacios en los encabezados y devuelve el DataFrame
     df.columns = [str(c).strip() for c in df.columns]
     return df
 
-def cargar_datos() -> tuple[pd.DataFrame, pd.DataFrame]:
-    # Carga archivos base y normaliza encabezados en ambos DataFrames
-    pedidos = pd.read_csv(PEDIDOS_FILE, sep=";")
-    inventario = pd.read_csv(INVENTARIO_FILE, sep=";")
+def cargar_datos(
+    pedidos: pd.DataFrame | None = None, inventario: pd.DataFrame | None = None
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # Carga archivos base (o copia superficial de los DataFrames ya leídos) y normaliza encabezados
+    pedidos = leer_pedidos_csv() if pedidos is None else pedidos.copy(deep=False)
+    inventario = leer_inventario_csv() if inventario is None else inventario.copy(deep=False)
     _normalizar_columnas(pedidos)
     _normalizar_columnas(inventario)
+
+    # La cantidad se lee como texto; valores no numéricos ('-', 'x') quedan como NaN
+    # y la suma por SKU los ignora
+    if "Lineitem quantity" in pedidos.columns:
+        pedidos["Lineitem quantity"] = pd.to_numeric(pedidos["Lineitem quantity"], errors="coerce")
+
+    # Claves repetidas como categóricas: groupby/merge/sort comparan códigos enteros
+    # y cada texto se guarda una sola vez
+    for col in COLS_CATEGORICAS_PEDIDOS:
+        if col in pedidos.columns:
+            (pedidos[col],) = claves_categoricas(pedidos[col])
     return pedidos, inventario
 
 def preparar_agrupado_pedidos(pedidos: pd.DataFrame) -> pd.DataFrame:
@@ -46,7 +88,7 @@ def preparar_agrupado_pedidos(pedidos: pd.DataFrame) -> pd.DataFrame:
 
     # Agrupar por SKU, nombre y proveedor
     agrupado = (
-        pedidos.groupby(["Lineitem sku", "Lineitem name", "Vendor"], as_index=False)
+        pedidos.groupby(["Lineitem sku", "Lineitem name", "Vendor"], as_index=False, observed=True)
         .agg({"Lineitem quantity": "sum"})
     )
 
@@ -79,7 +121,13 @@ def calcular_faltantes(agrupado: pd.DataFrame, inventario: pd.DataFrame) -> pd.D
     inv_cols: List[str] = [inv_key, "Existencias"]
     if "Vendor" in inventario.columns:
         inv_cols.append("Vendor")
-    inventario_sel = inventario[inv_cols].copy()
+    inventario_sel = inventario[inv_cols]
+
+    # Ambas claves como texto con las mismas categorías antes del cruce
+    agrupado = agrupado.copy(deep=False)
+    agrupado["SKU"], inventario_sel[inv_key] = claves_categoricas(
+        agrupado["SKU"], inventario_sel[inv_key]
+    )
 
     req = pd.merge(
         agrupado,
@@ -94,7 +142,7 @@ def calcular_faltantes(agrupado: pd.DataFrame, inventario: pd.DataFrame) -> pd.D
 
     req["Faltante"] = (req["Cantidad_Pedida"] - req["Existencias"]).clip(lower=0)
 
-    faltantes = req[req["Faltante"] > 0].copy()
+    faltantes = req[req["Faltante"] > 0]
     return faltantes
 
 
@@ -103,19 +151,116 @@ def adjuntar_clientes(pedidos: pd.DataFrame, faltantes: pd.DataFrame) -> pd.Data
     if "Billing Name" not in pedidos.columns or "Lineitem sku" not in pedidos.columns:
         return faltantes
 
+    # Deduplicar pares (SKU, cliente) antes de agrupar: el groupby trabaja sobre un
+    # frame más pequeño y agrega listas en lugar de arreglos de numpy
     clientes = (
-        pedidos.groupby("Lineitem sku")["Billing Name"].unique().reset_index()
+        pedidos[["Lineitem sku", "Billing Name"]].drop_duplicates()
+        .groupby("Lineitem sku", observed=True)["Billing Name"].agg(list).reset_index()
         .rename(columns={"Lineitem sku": "SKU", "Billing Name": "Clientes"})
     )
     return faltantes.merge(clientes, on="SKU", how="left")
 
 
-def guardar_reporte(faltantes: pd.DataFrame) -> Path:
+def sanitize_sheet(name: str) -> str:
+    # Reglas de Excel: máx 31 chars, no : \ / ? * [ ]
+    cleaned = _SHEET_BAD.sub(" ", str(name or "Proveedor"))
+    cleaned = cleaned.strip().strip("'")  # sin comillas al borde
+    return (cleaned or "Proveedor")[:31]
+
+
+def _filas(df: pd.DataFrame):
+    # Genera las filas una a una como valores nativos; los nulos pasan a None (celda
+    # vacía, igual que DataFrame.to_excel). Se reemplazan fila por fila y sólo en las
+    # columnas que tienen nulos, sin convertir antes la hoja completa a object
+    con_nulos = [i for i in range(df.shape[1]) if df.iloc[:, i].isna().any()]
+    for fila in df.itertuples(index=False, name=None):
+        if con_nulos:
+            fila = list(fila)
+            for i in con_nulos:
+                if is_scalar(fila[i]) and pd.isna(fila[i]):
+                    fila[i] = None
+        yield fila
+
+
+def _guardar_openpyxl(path: Path, hojas) -> None:
+    # Libro openpyxl en modo write-only: las filas se escriben en streaming sin
+    # mantener el árbol de celdas en memoria
+    wb = Workbook(write_only=True)
+    for nombre, df in hojas:
+        ws = wb.create_sheet(nombre)
+        encabezado = []
+        for col in df.columns:
+            cell = WriteOnlyCell(ws, value=str(col))
+            cell.font = Font(bold=True)
+            encabezado.append(cell)
+        ws.append(encabezado)
+        for row in _filas(df):
+            ws.append(row)
+    wb.save(path)
+
+
+def _guardar_xlsxwriter(path: Path, hojas) -> None:
+    # Libro xlsxwriter en modo constant_memory: cada fila se vuelca a disco al pasar
+    # a la siguiente, así que se escribe estrictamente fila por fila
+    if xlsxwriter is None:
+        raise ImportError("El motor 'xlsxwriter' requiere instalar el paquete xlsxwriter.")
+    wb = xlsxwriter.Workbook(str(path), {"constant_memory": True})
+    negrita = wb.add_format({"bold": True})
+    for nombre, df in hojas:
+        ws = wb.add_worksheet(nombre)
+        ws.write_row(0, 0, [str(c) for c in df.columns], negrita)
+        for r, row in enumerate(_filas(df), start=1):
+            ws.write_row(r, 0, row)
+    wb.close()
+
+
+# Motores de escritura disponibles para guardar_reporte
+ESCRITORES_EXCEL = {
+    "openpyxl": _guardar_openpyxl,
+    "xlsxwriter": _guardar_xlsxwriter,
+}
+
+
+def _hojas_reporte(df_sorted: pd.DataFrame, split_by_proveedor: bool):
+    # Genera (nombre_hoja, DataFrame) en orden: la hoja general y, si se solicitan,
+    # una hoja por proveedor. Al ser un generador, cada hoja se escribe al producirse
+    yield "Ordenes_Proveedor", df_sorted
+
+    # Hojas por PROVEEDOR (agrupado), sólo si se solicitan
+    if split_by_proveedor and "PROVEEDOR" in df_sorted.columns:
+        used_names = set(["Ordenes_Proveedor"])  # evitar colisión
+        # Una sola pasada lineal: groupby entrega cada sub-DataFrame (ya ordenado por SKU)
+        # sin evaluar una máscara booleana por proveedor; los proveedores nulos se omiten
+        for prov, df_prov in df_sorted.groupby("PROVEEDOR", sort=False, dropna=True, observed=True):
+            sheet = sanitize_sheet(prov)
+            base = sheet
+            i = 1
+            while sheet in used_names:
+                suffix = f"_{i}"
+                sheet = (base[: max(0, 31 - len(suffix))] + suffix) or f"Prov_{i}"
+                i += 1
+            used_names.add(sheet)
+
+            yield sheet, df_prov
+
+
+def guardar_reporte(
+    faltantes: pd.DataFrame, split_by_proveedor: bool = False, engine: str | None = None
+) -> Path:
     # Crea carpeta de salida y escribe el Excel con la hoja Ordenes_Proveedor
     # Exporta columnas: SKU, PRODUCTO, PROVEEDOR y CANTIDADAPEIDIR (renombrada desde 'Faltante')
+    # Las hojas por proveedor sólo se escriben si split_by_proveedor=True (la Tarea 2
+    # consume únicamente la hoja principal)
+    # engine: 'openpyxl' (por defecto) o 'xlsxwriter'; si no se indica se usa EXCEL_ENGINE
+    engine = engine or EXCEL_ENGINE
+    if engine not in ESCRITORES_EXCEL:
+        raise ValueError(
+            f"Motor de Excel no soportado: {engine!r}. "
+            f"Opciones: {', '.join(ESCRITORES_EXCEL)}"
+        )
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    df = faltantes.copy()
+    df = faltantes
     # Construir el DataFrame de salida con las 3 columnas solicitadas
     out_cols = {}
     out_cols["SKU"] = df["SKU"]
@@ -135,36 +280,10 @@ def guardar_reporte(faltantes: pd.DataFrame) -> Path:
 
     df_out = pd.DataFrame(out_cols, columns=["SKU", "PRODUCTO", "PROVEEDOR", "CANTIDADAPEIDIR"])
 
-    with pd.ExcelWriter(OUTPUT_FILE, engine="openpyxl") as writer:
-        # Hoja general (compatibilidad con Tarea 2): ordenada por PROVEEDOR y SKU
-        df_general = df_out
-        if "PROVEEDOR" in df_general.columns:
-            df_general = df_general.sort_values(["PROVEEDOR", "SKU"], kind="mergesort")
-        df_general.to_excel(writer, index=False, sheet_name="Ordenes_Proveedor")
-
-        # Hojas por PROVEEDOR (agrupado)
-        if "PROVEEDOR" in df_out.columns:
-            # Ordenar por PROVEEDOR y SKU para lectura más cómoda
-            df_sorted = df_out.sort_values(["PROVEEDOR", "SKU"], kind="mergesort")
-
-            def sanitize_sheet(name: str) -> str:
-                # Reglas de Excel: máx 31 chars, no : \ / ? * [ ]
-                cleaned = re.sub(r"[:\\/\?\*\[\]]", " ", str(name or "Proveedor"))
-                cleaned = cleaned.strip().strip("'")  # sin comillas al borde
-                return (cleaned or "Proveedor")[:31]
-
-            used_names = set(["Ordenes_Proveedor"])  # evitar colisión
-            for prov in df_sorted["PROVEEDOR"].dropna().astype(str).unique():
-                sheet = sanitize_sheet(prov)
-                base = sheet
-                i = 1
-                while sheet in used_names:
-                    suffix = f"_{i}"
-                    sheet = (base[: max(0, 31 - len(suffix))] + suffix) or f"Prov_{i}"
-                    i += 1
-                used_names.add(sheet)
-
-                df_prov = df_sorted[df_sorted["PROVEEDOR"] == prov]
-                df_prov.to_excel(writer, index=False, sheet_name=sheet)
+    # Hoja general (compatibilidad con Tarea 2): ordenada por PROVEEDOR y SKU.
+    # El mismo orden se reutiliza para las hojas por proveedor (un solo sort)
+    df_sorted = df_out.sort_values(["PROVEEDOR", "SKU"], kind="mergesort")
+
+    ESCRITORES_EXCEL[engine](OUTPUT_FILE, _hojas_reporte(df_sorted, split_by_proveedor))
     return OUTPUT_FILE
 
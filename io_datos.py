@@ -0,0 +1,91 @@
+# Lectura/escritura de CSV compartida por las tareas
+#
+# Un solo lugar para los detalles de E/S comunes (separador ';', tipos conocidos
+# por archivo, motores opcionales y configuración de pandas), así generar_ordenes,
+# recepción y reporte leen y escriben los CSV de la misma forma.
+
+from pathlib import Path
+from typing import Dict
+
+import pandas as pd
+
+try:  # pyarrow es opcional: lector/escritor CSV multihilo, sin inferencia fila a fila
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    CSV_ENGINE = "pyarrow"
+except ImportError:  # pragma: no cover - sin pyarrow usamos pandas (motor C)
+    pa = None
+    CSV_ENGINE = "c"
+
+# Copy-on-Write (siempre activo desde pandas 3.0): las selecciones comparten memoria
+# hasta que se modifican, así que no hacen falta .copy() defensivos. Se fija aquí una
+# sola vez; generar_ordenes, recepción y reporte importan este módulo
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+# Archivos de entrada comunes a las tareas
+BASE_DIR = Path(__file__).resolve().parent
+PEDIDOS_FILE = BASE_DIR / "data" / "pedidos.csv"
+INVENTARIO_FILE = BASE_DIR / "data" / "inventario.csv"
+
+# Columnas leídas como texto (conserva ceros a la izquierda en los códigos); las
+# cantidades se convierten después con to_numeric, igual que celdas como '-'.
+# En pedidos la cantidad también va como texto: tiene vacíos y, con un dtype parcial,
+# pyarrow (pandas 3) no logra inferirla como entero y habría que releer con el motor C.
+# El inventario se lee completo como texto porque su columna de código se detecta por
+# nombre (SKU, Producto, CODPRODUCTO, ...) y debe cruzar con el SKU de texto de pedidos
+DTYPES_PEDIDOS = {"Lineitem sku": str, "Lineitem quantity": str}
+DTYPES_INVENTARIO = str
+DTYPES_RECEPCION = {"SKU": str}
+
+
+def claves_categoricas(*claves: pd.Series) -> tuple[pd.Series, ...]:
+    # Convierte claves de cruce a texto y luego a categóricas con las mismas categorías.
+    # Así merge/groupby comparan códigos enteros, y una clave numérica en un lado no
+    # deja el cruce sin coincidencias (pandas no avisa al cruzar categóricas de tipos
+    # distintos). Las categorías quedan ordenadas, como con astype("category"), para que
+    # los ordenamientos por la clave no cambien. Los nulos se conservan como nulos
+    textos = [c.astype("string") for c in claves]
+    categorias = pd.Index(pd.concat(textos, ignore_index=True).dropna().unique()).sort_values()
+    tipo = pd.CategoricalDtype(categorias)
+    return tuple(t.astype(tipo) for t in textos)
+
+
+def leer_csv(path: Path, dtype: Dict[str, object] | type) -> pd.DataFrame:
+    # Lee un CSV separado por ';' con el motor disponible y los tipos de texto indicados
+    # (un dict por columna o un tipo para todas). Si pyarrow falla (p. ej. filas cortas)
+    # se reintenta con el motor C. Se pasa una copia del dict: pandas 3 lo modifica.
+    def tipos():
+        return dict(dtype) if isinstance(dtype, dict) else dtype
+
+    if CSV_ENGINE == "pyarrow":
+        try:
+            return pd.read_csv(path, sep=";", engine="pyarrow", dtype=tipos())
+        except ValueError:  # incluye pandas.errors.ParserError
+            pass
+    return pd.read_csv(path, sep=";", dtype=tipos())
+
+
+def leer_pedidos_csv() -> pd.DataFrame:
+    # Lectura cruda de pedidos.csv (sin normalizar); la UI la comparte entre tareas
+    return leer_csv(PEDIDOS_FILE, DTYPES_PEDIDOS)
+
+
+def leer_inventario_csv() -> pd.DataFrame:
+    # Lectura cruda de inventario.csv (sin normalizar); la UI la comparte entre tareas
+    return leer_csv(INVENTARIO_FILE, DTYPES_INVENTARIO)
+
+
+def escribir_csv(df: pd.DataFrame, path: Path) -> None:
+    # Escribe el CSV separado por ';' con el escritor multihilo de pyarrow. Si pyarrow
+    # no está instalado o la tabla no se puede convertir (p. ej. tipos mixtos), usa pandas.
+    # Arrow pone entre comillas el encabezado y todos los campos de texto; pandas no.
+    if pa is not None:
+        try:
+            tabla = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            tabla = None
+        if tabla is not None:
+            pacsv.write_csv(tabla, str(path), pacsv.WriteOptions(delimiter=";"))
+            return
+    df.to_csv(path, sep=";", index=False)
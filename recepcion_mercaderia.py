@@ -4,11 +4,20 @@
 # Se eliminan las funciones de interacción por consola.
 
 from pathlib import Path
-from datetime import datetime
-from typing import List
+import time
+from typing import Tuple
 
 import pandas as pd
 
+from io_datos import escribir_csv
+
+try:  # python-calamine es opcional: lector XLSX en Rust (pandas >= 2.2)
+    import python_calamine  # noqa: F401
+    _pd_version = tuple(int(x) for x in pd.__version__.split(".")[:2])
+    EXCEL_READ_ENGINE = "calamine" if _pd_version >= (2, 2) else "openpyxl"
+except ImportError:  # pragma: no cover - sin calamine se lee con openpyxl
+    EXCEL_READ_ENGINE = "openpyxl"
+
 
 # Configuración de rutas
 BASE_DIR = Path(__file__).resolve().parent
@@ -16,24 +25,28 @@ ORDENES_XLSX = BASE_DIR / "data" / "ordenesc" / "ordenes_proveedor.xlsx"
 RECEPCIONES_DIR = BASE_DIR / "data" / "recepciones"
 
 
+# Columnas candidatas para la cantidad ordenada, en orden de prioridad.
+# Priorizamos 'Faltante' generado por generar_ordenes.py
+CANDIDATOS_CANTIDAD: Tuple[str, ...] = (
+    "Faltante",
+    "CANTIDADAPEIDIR",
+    "Cantidad_Ordenada",
+    "Cantidad a pedir",
+    "A_Ordenar",
+    "Cantidad_Pedida_Proveedor",
+)
+
+
 def _guess_qty_column(df: pd.DataFrame) -> str:
     # Detecta la columna de cantidad ordenada al proveedor.
-    # Priorizamos 'Faltante' generado por generar_ordenes.py
-    candidatos: List[str] = [
-        "Faltante",
-        "CANTIDADAPEIDIR",
-        "Cantidad_Ordenada",
-        "Cantidad a pedir",
-        "A_Ordenar",
-        "Cantidad_Pedida_Proveedor",
-    ]
-
-    for col in candidatos:
-        if col in df.columns:
+    # Búsqueda O(1) por candidato sobre un set de encabezados
+    cols_set = set(df.columns)
+    for col in CANDIDATOS_CANTIDAD:
+        if col in cols_set:
             return col
 
     # Respaldo: si no existe ninguna, intentamos con 'Cantidad_Pedida'
-    if "Cantidad_Pedida" in df.columns:
+    if "Cantidad_Pedida" in cols_set:
         return "Cantidad_Pedida"
 
     raise KeyError(
@@ -43,6 +56,11 @@ def _guess_qty_column(df: pd.DataFrame) -> str:
     )
 
 
+def leer_excel(path: Path, sheet: str) -> pd.DataFrame:
+    # Lee una hoja del Excel con el motor disponible (calamine u openpyxl)
+    return pd.read_excel(path, sheet_name=sheet, engine=EXCEL_READ_ENGINE)
+
+
 def cargar_reporte_ordenes(sheet: str = "Ordenes_Proveedor") -> pd.DataFrame:
     # Carga el Excel de órdenes y devuelve un DataFrame listo para recepción.
     # Requiere columnas al menos: SKU, Producto y la cantidad ordenada (detectada).
@@ -51,7 +69,7 @@ def cargar_reporte_ordenes(sheet: str = "Ordenes_Proveedor") -> pd.DataFrame:
             f"No se encontró {ORDENES_XLSX}. Ejecuta primero 'generar_ordenes.py' para crear el reporte."
         )
 
-    df = pd.read_excel(ORDENES_XLSX, sheet_name=sheet)
+    df = leer_excel(ORDENES_XLSX, sheet)
 
     # Normalizamos encabezados y quitamos espacios
     df.columns = [str(c).strip() for c in df.columns]
@@ -94,8 +112,8 @@ def cargar_reporte_ordenes(sheet: str = "Ordenes_Proveedor") -> pd.DataFrame:
 
 def guardar_reporte(recepcion_df: pd.DataFrame) -> Path:
     RECEPCIONES_DIR.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    ts = time.strftime("%Y%m%d_%H%M%S")
     out_csv = RECEPCIONES_DIR / f"recepcion_{ts}.csv"
-    recepcion_df.to_csv(out_csv, sep=";", index=False)
+    escribir_csv(recepcion_df, out_csv)
     return out_csv
 
@@ -6,36 +6,50 @@
 from __future__ import annotations
 
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, List
+import time
+from typing import Dict
 
+import numpy as np
 import pandas as pd
 import re
 
+from io_datos import (
+    DTYPES_RECEPCION,
+    claves_categoricas,
+    escribir_csv,
+    leer_csv,
+    leer_inventario_csv,
+    leer_pedidos_csv,
+)
+
+try:  # Numba es opcional: si está instalado compila el kernel FIFO a código nativo
+    from numba import njit
+except ImportError:  # pragma: no cover - sin numba se usa la ruta vectorizada
+    njit = None
+
 # Rutas del proyecto
 BASE_DIR = Path(__file__).resolve().parent
-PEDIDOS_FILE = BASE_DIR / "data" / "pedidos.csv"
-INVENTARIO_FILE = BASE_DIR / "data" / "inventario.csv"
 RECEPCIONES_DIR = BASE_DIR / "data" / "recepciones"
 REPORTES_DIR = BASE_DIR / "data" / "reportes"
 
 # Regex precompilada para extraer número del identificador de pedido
 RE_NUM = re.compile(r"(\d+)")
 
+# Tabla de traducción para normalizar encabezados en una sola pasada:
+# quita acentos comunes y elimina separadores
+_TABLA_NORM_COL = str.maketrans(
+    {
+        "á": "a", "é": "e", "í": "i", "ó": "o", "ú": "u",
+        "ä": "a", "ë": "e", "ï": "i", "ö": "o", "ü": "u",
+        "ñ": "n",
+        " ": None, "_": None, "-": None, "/": None, "\\": None,
+    }
+)
+
 
 def _norm_col_name(name: str) -> str:
     # Normaliza un nombre de columna: minúsculas, sin separadores y sin acentos
-    s = str(name or "").strip().lower()
-    # quitar acentos comunes
-    s = (
-        s.replace("á", "a").replace("é", "e").replace("í", "i").replace("ó", "o").replace("ú", "u")
-         .replace("ä", "a").replace("ë", "e").replace("ï", "i").replace("ö", "o").replace("ü", "u")
-         .replace("ñ", "n")
-    )
-    # quitar separadores
-    for ch in (" ", "_", "-", "/", "\\"):
-        s = s.replace(ch, "")
-    return s
+    return str(name or "").strip().lower().translate(_TABLA_NORM_COL)
 
 
 def _detectar_columna_sku_inventario(inv: pd.DataFrame) -> str | None:
@@ -94,14 +108,22 @@ def _detectar_columna_orden(df: pd.DataFrame) -> str | None:
             return lc[cand.lower()]
     return None
 
-def _normalizar_id_pedido(valor) -> str:
+def _normalizar_id_pedido(valores: pd.Series) -> pd.Series:
     # Extrae un identificador comparable del pedido. Ej: '#1001' -> '1001'.
-    s = str(valor or "").strip()
-    m = RE_NUM.search(s)
-    return m.group(1) if m else s
+    # Vectorizado: una sola pasada de la regex sobre la columna; sin dígitos se conserva el texto.
+    s = valores.fillna("").astype(str).str.strip()
+    return s.str.extract(RE_NUM.pattern, expand=False).fillna(s)
 
-def cargar_pedidos() -> pd.DataFrame:
-    df = pd.read_csv(PEDIDOS_FILE, sep=";")
+
+def _columna_texto(df: pd.DataFrame, col: str) -> pd.Series:
+    # Devuelve la columna como texto sin espacios al borde ('' en nulos o si no existe)
+    if col not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[col].fillna("").astype(str).str.strip()
+
+def cargar_pedidos(df: pd.DataFrame | None = None) -> pd.DataFrame:
+    # Lee pedidos.csv, o trabaja sobre una copia superficial del DataFrame crudo ya leído
+    df = leer_pedidos_csv() if df is None else df.copy(deep=False)
     df.columns = [str(c).strip() for c in df.columns]
     rename = {
         "Lineitem sku": "SKU",
@@ -120,6 +142,9 @@ def cargar_pedidos() -> pd.DataFrame:
 
     # Aseguramos tipos
     df["Cantidad"] = pd.to_numeric(df["Cantidad"], errors="coerce").fillna(0).astype(int)
+    # SKU categórico: la factorización del FIFO reutiliza sus códigos enteros.
+    # 'Cliente' se mantiene como texto porque se reescribe con el nombre completo del pedido
+    (df["SKU"],) = claves_categoricas(df["SKU"])
 
     # Índice de orden para priorizar FIFO según el orden del CSV
     df["Orden"] = range(len(df))
@@ -127,18 +152,18 @@ def cargar_pedidos() -> pd.DataFrame:
     # Asociar NOMBRE COMPLETO del cliente por número de pedido
     col_orden = _detectar_columna_orden(df)
     if col_orden:
-        df["OrderId"] = df[col_orden].apply(_normalizar_id_pedido)
+        df["OrderId"] = _normalizar_id_pedido(df[col_orden])
 
         # Determinar el NOMBRE COMPLETO por fila, priorizando columnas específicas
         nombre_completo = None
         if "Billing First Name" in df.columns or "Billing Last Name" in df.columns:
-            f = df.get("Billing First Name", "").astype(str).str.strip()
-            l = df.get("Billing Last Name", "").astype(str).str.strip()
-            nombre_completo = (f + " " + l).str.strip()
+            f = _columna_texto(df, "Billing First Name")
+            l = _columna_texto(df, "Billing Last Name")
+            nombre_completo = f.str.cat(l, sep=" ").str.strip()
         elif "Shipping First Name" in df.columns or "Shipping Last Name" in df.columns:
-            f = df.get("Shipping First Name", "").astype(str).str.strip()
-            l = df.get("Shipping Last Name", "").astype(str).str.strip()
-            nombre_completo = (f + " " + l).str.strip()
+            f = _columna_texto(df, "Shipping First Name")
+            l = _columna_texto(df, "Shipping Last Name")
+            nombre_completo = f.str.cat(l, sep=" ").str.strip()
         elif "Shipping Name" in df.columns:
             nombre_completo = df["Shipping Name"].astype(str).str.strip()
         else:
@@ -147,12 +172,11 @@ def cargar_pedidos() -> pd.DataFrame:
 
         df["NombreCompleto"] = nombre_completo
 
-        # Elegir el nombre correspondiente a la primera aparición del pedido (menor Orden)
-        idx_primera_aparicion = df.groupby("OrderId")["Orden"].idxmin()
+        # Elegir el nombre correspondiente a la primera aparición del pedido (menor Orden).
+        # Las filas siguen el orden del CSV, así que basta una deduplicación en una pasada
         mapeo = (
-            df.loc[idx_primera_aparicion, ["OrderId", "NombreCompleto"]]
+            df.drop_duplicates("OrderId", keep="first")
             .set_index("OrderId")["NombreCompleto"]
-            .to_dict()
         )
         # Sobrescribir 'Cliente' con el nombre completo del pedido
         df["Cliente"] = df["OrderId"].map(mapeo).fillna(df["Cliente"].astype(str).str.strip())
@@ -160,8 +184,9 @@ def cargar_pedidos() -> pd.DataFrame:
     return df
 
 
-def cargar_inventario() -> pd.DataFrame:
-    inv = pd.read_csv(INVENTARIO_FILE, sep=";")
+def cargar_inventario(inv: pd.DataFrame | None = None) -> pd.DataFrame:
+    # Lee inventario.csv, o trabaja sobre una copia superficial del DataFrame crudo ya leído
+    inv = leer_inventario_csv() if inv is None else inv.copy(deep=False)
     inv.columns = [str(c).strip() for c in inv.columns]
 
     # Determinar columna SKU/código usando heurística flexible
@@ -183,9 +208,10 @@ def cargar_inventario() -> pd.DataFrame:
         else:
             raise KeyError("'Existencias' no encontrada en inventario.csv")
 
-    inv = inv[[sku_col, "Existencias"]].copy()
+    inv = inv[[sku_col, "Existencias"]]
     inv.rename(columns={sku_col: "SKU"}, inplace=True)
     inv["Existencias"] = pd.to_numeric(inv["Existencias"], errors="coerce").fillna(0).astype(int)
+    (inv["SKU"],) = claves_categoricas(inv["SKU"])
     return inv
 
 
@@ -202,7 +228,7 @@ def cargar_ultima_recepcion() -> pd.DataFrame:
         )
 
     ultimo = archivos[-1]
-    df = pd.read_csv(ultimo, sep=";")
+    df = leer_csv(ultimo, DTYPES_RECEPCION)
     df.columns = [str(c).strip() for c in df.columns]
 
     # columnas mínimas requeridas
@@ -217,6 +243,58 @@ def cargar_ultima_recepcion() -> pd.DataFrame:
 
 
 # Asignación de stock a pedidos (FIFO)
+def _fifo_kernel(
+    codes: np.ndarray, cant: np.ndarray, disp_by_code: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    # Recorre las líneas en orden y descuenta el stock del SKU (código factorizado).
+    # Trabaja sólo con arreglos int64 para poder compilarse con numba en modo nopython.
+    n = cant.shape[0]
+    disp = disp_by_code.copy()
+    asignado = np.zeros(n, dtype=np.int64)
+    faltante = np.zeros(n, dtype=np.int64)
+    for i in range(n):
+        c = codes[i]
+        a = min(cant[i], max(0, disp[c]))
+        disp[c] -= a
+        asignado[i] = a
+        faltante[i] = max(0, cant[i] - a)
+    return asignado, faltante
+
+
+_fifo = njit(cache=True)(_fifo_kernel) if njit is not None else None
+
+
+def _fifo_vectorizado(
+    codes: np.ndarray, cant: np.ndarray, disp_by_code: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    # Mismo resultado que _fifo_kernel sin recorrer filas (codes debe venir agrupado por SKU).
+    # Con saldo negativo (stock en deuda) las líneas positivas no reciben nada y sólo las
+    # devoluciones (cantidad negativa) suben el saldo; esa fase es un prefijo de cada SKU.
+    # Desde que el saldo llega a >= 0 sigue la recursión saldo' = max(saldo - cant, 0),
+    # cuya forma cerrada es saldo_i = max(saldo0, máx. acumulado previo) - acumulado previo.
+    def por_sku(valores: np.ndarray):
+        return pd.Series(valores).groupby(codes, sort=False)
+
+    disp = disp_by_code[codes]
+    devolucion = np.minimum(cant, 0)
+    devuelto_previo = -(por_sku(devolucion).cumsum().to_numpy(dtype=np.int64) - devolucion)
+    en_deuda = disp + devuelto_previo < 0
+
+    # Saldo con el que empieza la fase normal: stock inicial + devoluciones en deuda
+    saldo0 = disp - por_sku(np.where(en_deuda, devolucion, 0)).transform("sum").to_numpy(
+        dtype=np.int64
+    )
+    cant_normal = np.where(en_deuda, 0, cant)
+    acumulado = por_sku(cant_normal).cumsum().to_numpy(dtype=np.int64)
+    previo = acumulado - cant_normal
+    tope = np.maximum(saldo0, por_sku(previo).cummax().to_numpy(dtype=np.int64))
+    asignado = np.where(
+        en_deuda, devolucion, cant_normal - np.maximum(acumulado - tope, 0)
+    )
+    faltante = np.maximum(cant - asignado, 0)
+    return asignado, faltante
+
+
 def asignar_stock_por_sku(
     pedidos: pd.DataFrame, disponible_por_sku: Dict[str, int]
 ) -> pd.DataFrame:
@@ -224,63 +302,75 @@ def asignar_stock_por_sku(
     # en orden FIFO (orden natural del CSV) por cada SKU.
     # Devuelve un DataFrame con columnas: Cliente, SKU, Producto, Cantidad_Pedida, Asignado, FaltanteCliente.
 
-    # Orden estable por SKU
-    pedidos_sorted = pedidos.sort_values(["SKU", "Orden"], kind="mergesort")
-
-    registros: List[Dict] = []
-    for sku, grupo in pedidos_sorted.groupby("SKU", sort=False):
-        disponible = int(disponible_por_sku.get(sku, 0))
-        for _, row in grupo.iterrows():
-            cant = int(row["Cantidad"])
-            asignado = min(cant, max(0, disponible))
-            faltante = max(0, cant - asignado)
-            disponible -= asignado
-
-            registros.append(
-                {
-                    "Cliente": row["Cliente"],
-                    "SKU": sku,
-                    "Producto": row["Producto"],
-                    "Cantidad_Pedida": cant,
-                    "Asignado": int(asignado),
-                    "FaltanteCliente": int(faltante),
-                }
-            )
-
-    return pd.DataFrame(registros)
+    # Orden estable por (SKU, Orden) sin ordenar el DataFrame completo: se factoriza el SKU
+    # a códigos enteros (ordenados) y se ordenan sólo índices. Las filas sin SKU (código -1)
+    # quedan fuera, igual que en groupby.
+    codes, uniques = pd.factorize(pedidos["SKU"], sort=True)
+    orden = np.lexsort((pedidos["Orden"].to_numpy(), codes))
+    orden = orden[codes[orden] >= 0]
+
+    codes_s = codes[orden].astype(np.int64)
+    cant = pedidos["Cantidad"].to_numpy(dtype=np.int64)[orden]
+    disp_by_code = np.array([int(disponible_por_sku.get(u, 0)) for u in uniques], dtype=np.int64)
+
+    if _fifo is not None:
+        # FIFO secuencial compilado sobre códigos de SKU y cantidades int64
+        asignado, faltante = _fifo(codes_s, cant, disp_by_code)
+    else:
+        # FIFO vectorizado con el mismo resultado que el kernel
+        asignado, faltante = _fifo_vectorizado(codes_s, cant, disp_by_code)
+
+    return pd.DataFrame(
+        {
+            "Cliente": pedidos["Cliente"].to_numpy()[orden],
+            "SKU": pedidos["SKU"].to_numpy()[orden],
+            "Producto": pedidos["Producto"].to_numpy()[orden],
+            "Cantidad_Pedida": cant,
+            "Asignado": asignado,
+            "FaltanteCliente": faltante,
+        }
+    )
 
 
-def generar_reporte() -> Path:
-    # Datos base
-    pedidos = cargar_pedidos()
-    inventario = cargar_inventario()
+def generar_reporte(
+    pedidos_csv: pd.DataFrame | None = None, inventario_csv: pd.DataFrame | None = None
+) -> Path:
+    # Datos base. pedidos/inventario pueden venir ya leídos (crudos), p. ej. desde la
+    # caché compartida de la UI; si no, se leen de disco
+    pedidos = cargar_pedidos(pedidos_csv)
+    inventario = cargar_inventario(inventario_csv)
     recepcion = cargar_ultima_recepcion()
 
     # Stock disponible por SKU = Existencias + Recibido
     recibido_por_sku = recepcion.groupby("SKU", as_index=False)["Recibido"].sum()
+    # Ambas claves como texto con las mismas categorías antes del cruce
+    inventario["SKU"], recibido_por_sku["SKU"] = claves_categoricas(
+        inventario["SKU"], recibido_por_sku["SKU"]
+    )
     base = (
         inventario.merge(recibido_por_sku, on="SKU", how="left")
         .fillna({"Recibido": 0})
     )
     base["Disponible"] = base["Existencias"] + base["Recibido"]
 
-    disponible_por_sku: Dict[str, int] = {
-        str(r.SKU): int(r.Disponible) for r in base[["SKU", "Disponible"]].itertuples(index=False)
-    }
+    # Conversión por columnas (sin itertuples); tolist() entrega str/int nativos
+    disponible_por_sku: Dict[str, int] = dict(
+        zip(base["SKU"].astype(str).tolist(), base["Disponible"].astype(int).tolist())
+    )
 
     asignaciones = asignar_stock_por_sku(pedidos, disponible_por_sku)
 
     # Solo faltantes de clientes
-    faltantes_clientes = asignaciones[asignaciones["FaltanteCliente"] > 0].copy()
+    faltantes_clientes = asignaciones[asignaciones["FaltanteCliente"] > 0]
 
     # Orden amigable: por Cliente, luego por SKU
     faltantes_clientes.sort_values(["Cliente", "SKU"], inplace=True)
 
     # Guardar
     REPORTES_DIR.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    ts = time.strftime("%Y%m%d_%H%M%S")
     out_csv = REPORTES_DIR / f"faltantes_por_cliente_{ts}.csv"
-    faltantes_clientes.to_csv(out_csv, sep=";", index=False)
+    escribir_csv(faltantes_clientes, out_csv)
     
     return out_csv
 
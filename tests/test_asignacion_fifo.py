@@ -0,0 +1,111 @@
+# Verifica que la ruta vectorizada del FIFO coincida con el kernel secuencial
+# (la ruta usada depende de si numba está instalado).
+
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import reporte_faltantes_por_cliente as rep  # noqa: E402
+
+
+def _comparar(codes, cant, disp):
+    codes = np.asarray(codes, dtype=np.int64)
+    cant = np.asarray(cant, dtype=np.int64)
+    disp = np.asarray(disp, dtype=np.int64)
+    esperado = rep._fifo_kernel(codes, cant, disp)
+    obtenido = rep._fifo_vectorizado(codes, cant, disp)
+    np.testing.assert_array_equal(obtenido[0], esperado[0])
+    np.testing.assert_array_equal(obtenido[1], esperado[1])
+
+
+def test_cantidad_negativa_devuelve_stock():
+    # SKU con stock 3: la línea -3 devuelve stock y la siguiente recibe 5
+    _comparar([0, 0], [-3, 5], [3])
+    asignado, faltante = rep._fifo_vectorizado(
+        np.array([0, 0]), np.array([-3, 5]), np.array([3])
+    )
+    assert asignado.tolist() == [-3, 5]
+    assert faltante.tolist() == [0, 0]
+
+
+def test_stock_negativo_no_asigna_unidades_inexistentes():
+    # SKU con stock -5: la devolución de 3 deja el saldo en -2 y la línea de 5 no recibe nada
+    _comparar([0, 0], [-3, 5], [-5])
+    asignado, faltante = rep._fifo_vectorizado(
+        np.array([0, 0]), np.array([-3, 5]), np.array([-5])
+    )
+    assert asignado.tolist() == [-3, 0]
+    assert faltante.tolist() == [0, 5]
+    # Las devoluciones pueden sacar el saldo de la deuda y el resto se asigna en FIFO
+    _comparar([0, 0, 0, 0, 1], [4, -6, 3, 2, 1], [-2, -1])
+
+
+def test_vectorizado_igual_al_kernel_aleatorio():
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        n = int(rng.integers(0, 30))
+        n_skus = int(rng.integers(1, 5))
+        codes = np.sort(rng.integers(0, n_skus, n))
+        cant = rng.integers(-4, 8, n)
+        disp = rng.integers(-10, 15, n_skus)
+        _comparar(codes, cant, disp)
+
+
+def _asignar_referencia(pedidos, disponible_por_sku):
+    # Implementación original: sort_values por (SKU, Orden) y recorrido fila a fila
+    registros = []
+    pedidos_sorted = pedidos.sort_values(["SKU", "Orden"], kind="mergesort")
+    for sku, grupo in pedidos_sorted.groupby("SKU", sort=False, observed=True):
+        disponible = int(disponible_por_sku.get(sku, 0))
+        for _, row in grupo.iterrows():
+            cant = int(row["Cantidad"])
+            asignado = min(cant, max(0, disponible))
+            disponible -= asignado
+            registros.append(
+                {
+                    "Cliente": row["Cliente"],
+                    "SKU": sku,
+                    "Producto": row["Producto"],
+                    "Cantidad_Pedida": cant,
+                    "Asignado": asignado,
+                    "FaltanteCliente": max(0, cant - asignado),
+                }
+            )
+    return pd.DataFrame(registros)
+
+
+@pytest.mark.parametrize("con_kernel", [True, False])
+def test_asignar_stock_por_sku_igual_a_la_version_original(monkeypatch, con_kernel):
+    # Filas fuera de orden de 'Orden', un SKU nulo y stock negativo en un SKU
+    if not con_kernel:
+        monkeypatch.setattr(rep, "_fifo", None)
+    elif rep._fifo is None:
+        monkeypatch.setattr(rep, "_fifo", rep._fifo_kernel)
+    pedidos = pd.DataFrame(
+        {
+            "Cliente": ["Ana", "Luis", "Eva", "Ana", "Juan", "Eva", "Luis"],
+            "SKU": pd.Series(["B2", "A1", None, "A1", "B2", "C3", "A1"], dtype="category"),
+            "Producto": ["Berro", "Acelga", "Sin código", "Acelga", "Berro", "Col", "Acelga"],
+            "Cantidad": [2, 3, 4, 1, 5, 2, 2],
+            "Orden": [5, 6, 0, 1, 2, 3, 4],
+        }
+    )
+    disponible = {"A1": 4, "B2": 6, "C3": -1}
+
+    obtenido = rep.asignar_stock_por_sku(pedidos, disponible)
+    esperado = _asignar_referencia(pedidos, disponible)
+
+    assert "Sin código" not in obtenido["Producto"].tolist()
+    assert obtenido["SKU"].astype(str).tolist() == ["A1", "A1", "A1", "B2", "B2", "C3"]
+    pd.testing.assert_frame_equal(
+        obtenido.astype({"SKU": str}),
+        esperado.astype({"SKU": str}),
+        check_dtype=False,
+    )
@@ -0,0 +1,85 @@
+# Lectura de los CSV de entrada: tipos de las columnas de código y motor usado
+
+from pathlib import Path
+import sys
+
+import pandas as pd
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import generar_ordenes  # noqa: E402
+import io_datos  # noqa: E402
+import reporte_faltantes_por_cliente as rep  # noqa: E402
+
+
+def test_leer_pedidos_csv_sin_releer_con_motor_c(monkeypatch):
+    # El archivo incluido se lee en una sola pasada con pyarrow (sin reintento)
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(io_datos, "CSV_ENGINE", "pyarrow")
+    motores = []
+    read_csv = pd.read_csv
+
+    def espia(*args, **kwargs):
+        motores.append(kwargs.get("engine"))
+        return read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(io_datos.pd, "read_csv", espia)
+    pedidos = io_datos.leer_pedidos_csv()
+    assert motores == ["pyarrow"]
+    assert not pedidos.empty
+
+
+def test_inventario_con_codigos_numericos_bajo_sku(tmp_path):
+    # Códigos numéricos en inventario y pedidos deben cruzar como texto
+    pedidos_csv = tmp_path / "pedidos.csv"
+    pedidos_csv.write_text(
+        "Lineitem sku;Lineitem name;Vendor;Lineitem quantity;Billing Name\n"
+        "101;Acelga;Huerto;5;Ana\n"
+        "202;Lechuga;Huerto;1;Luis\n",
+        encoding="utf-8",
+    )
+    inventario_csv = tmp_path / "inventario.csv"
+    inventario_csv.write_text("SKU;Existencias\n101;1\n202;5\n", encoding="utf-8")
+
+    pedidos_raw = io_datos.leer_csv(pedidos_csv, io_datos.DTYPES_PEDIDOS)
+    inventario_raw = io_datos.leer_csv(inventario_csv, io_datos.DTYPES_INVENTARIO)
+
+    # Tarea 1: sólo falta 101 (5 pedidos - 1 en stock); 202 tiene stock suficiente
+    pedidos, inventario = generar_ordenes.cargar_datos(pedidos_raw, inventario_raw)
+    faltantes = generar_ordenes.calcular_faltantes(
+        generar_ordenes.preparar_agrupado_pedidos(pedidos), inventario
+    )
+    assert dict(zip(faltantes["SKU"].astype(str), faltantes["Faltante"])) == {"101": 4}
+
+    # Tarea 3: el inventario conserva los códigos como texto, igual que pedidos
+    inv = rep.cargar_inventario(inventario_raw)
+    assert sorted(inv["SKU"].astype(str)) == ["101", "202"]
+    assert dict(zip(inv["SKU"].astype(str), inv["Existencias"])) == {"101": 1, "202": 5}
+
+
+def test_cruce_con_clave_numerica_en_inventario():
+    # Un inventario leído sin tipos (clave int64) debe cruzar igual con el SKU categórico
+    pedidos = pd.DataFrame(
+        {
+            "Lineitem sku": ["101", "202"],
+            "Lineitem name": ["Acelga", "Lechuga"],
+            "Vendor": ["Huerto", "Huerto"],
+            "Lineitem quantity": ["5", "1"],
+            "Billing Name": ["Ana", "Luis"],
+        }
+    )
+    inventario = pd.DataFrame({"SKU": [101, 202], "Existencias": [1, 5]})
+    pedidos, inventario = generar_ordenes.cargar_datos(pedidos, inventario)
+    faltantes = generar_ordenes.calcular_faltantes(
+        generar_ordenes.preparar_agrupado_pedidos(pedidos), inventario
+    )
+    assert dict(zip(faltantes["SKU"].astype(str), faltantes["Faltante"])) == {"101": 4}
+
+    izq, der = io_datos.claves_categoricas(
+        pd.Series(["101", None], dtype="category"), pd.Series([101, 303])
+    )
+    assert izq.dtype == der.dtype
+    assert izq.isna().tolist() == [False, True]
@@ -1,8 +1,8 @@
 from pathlib import Path
-from datetime import datetime
 import sys
  
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
@@ -11,7 +11,6 @@ import streamlit as st
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data"
 ORDENES_DIR = DATA_DIR / "ordenesc"
-RECEPCIONES_DIR = DATA_DIR / "recepciones"
 REPORTES_DIR = DATA_DIR / "reportes"
 ORDENES_XLSX = ORDENES_DIR / "ordenes_proveedor.xlsx"
 
@@ -19,7 +18,9 @@ ORDENES_XLSX = ORDENES_DIR / "ordenes_proveedor.xlsx"
 if str(BASE_DIR) not in sys.path:
     sys.path.insert(0, str(BASE_DIR))
 
+import io_datos  # type: ignore
 import generar_ordenes  # type: ignore
+import recepcion_mercaderia  # type: ignore
 import reporte_faltantes_por_cliente  # type: ignore
 
 
@@ -55,6 +56,43 @@ page = st.sidebar.radio(
 )
 
 
+# Columnas candidatas para la cantidad a pedir en el Excel de órdenes (por prioridad).
+# Lista propia de la UI: no es la misma que recepcion_mercaderia.CANDIDATOS_CANTIDAD
+CANDIDATOS_CANTIDAD_UI = (
+    "Faltante",
+    "CANTIDADAPEIDIR",
+    "CANTIDADAPEDIR",
+    "Cantidad_Ordenada",
+    "Cantidad_Pedida",
+    "Cantidad a pedir",
+    "A_Ordenar",
+)
+
+
+def _mtime(path: Path) -> float:
+    # Marca de modificación del archivo; sirve como clave de caché (0 si no existe).
+    # Las cachés guardan una sola entrada: al cambiar el archivo se descarta la anterior
+    return path.stat().st_mtime if path.exists() else 0.0
+
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def leer_pedidos_cache(pedidos_mtime: float) -> pd.DataFrame:
+    # pedidos.csv crudo, compartido por Tarea 1 y Tarea 3; se relee sólo si cambia el archivo
+    return io_datos.leer_pedidos_csv()
+
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def leer_inventario_cache(inventario_mtime: float) -> pd.DataFrame:
+    # inventario.csv crudo, compartido por Tarea 1 y Tarea 3; se relee sólo si cambia el archivo
+    return io_datos.leer_inventario_csv()
+
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def leer_ordenes_cache(ordenes_mtime: float) -> pd.DataFrame:
+    # Hoja principal del Excel de órdenes; se vuelve a leer sólo si cambia el archivo
+    return recepcion_mercaderia.leer_excel(ORDENES_XLSX, "Ordenes_Proveedor")
+
+
 def load_ordenes_df() -> pd.DataFrame:
     # Carga el Excel de órdenes del proveedor y devuelve un DataFrame.
     # Muestra advertencias/errores en la UI y devuelve un DataFrame vacío si hay problemas.
@@ -62,7 +100,7 @@ def load_ordenes_df() -> pd.DataFrame:
         st.warning("Aún no existe el Excel de órdenes. Ejecuta la Tarea 1.")
         return pd.DataFrame()
     try:
-        return pd.read_excel(ORDENES_XLSX, sheet_name="Ordenes_Proveedor")
+        return leer_ordenes_cache(_mtime(ORDENES_XLSX))
     except Exception as e:
         st.error(f"No se pudo leer {ORDENES_XLSX}: {e}")
         return pd.DataFrame()
@@ -79,19 +117,8 @@ def recepcion_ui() -> None:
     df.columns = [str(c).strip() for c in df.columns]
 
     # Detectar columna de cantidad a pedir
-    qty_col = None
-    for c in [
-        "Faltante",
-        "CANTIDADAPEIDIR",
-        "CANTIDADAPEDIR",
-        "Cantidad_Ordenada",
-        "Cantidad_Pedida",
-        "Cantidad a pedir",
-        "A_Ordenar",
-    ]:
-        if c in df.columns:
-            qty_col = c
-            break
+    cols_set = set(df.columns)
+    qty_col = next((c for c in CANDIDATOS_CANTIDAD_UI if c in cols_set), None)
     if qty_col is None:
         st.error("No se encontró una columna de cantidad ordenada (Faltante/CANTIDADAPEIDIR/...).")
         st.stop()
@@ -131,36 +158,41 @@ def recepcion_ui() -> None:
     )
 
     if st.button("Guardar recepción", key="save_recepcion"):
-        registros = []
+        # Cálculo vectorizado sobre las columnas editadas (sin recorrer filas).
         # 'edited' conserva el índice original de df; lo usamos para completar datos auxiliares
-        for idx, row in edited.iterrows():
-            base = df.loc[idx]
-            sku = row.get("SKU", base.get("SKU", "-"))
-            prod = base.get("Producto", base.get("PRODUCTO", "-"))
-            prov = base.get("Proveedor", base.get("PROVEEDOR", "-"))
-            pedido = int(pd.to_numeric(row.get(qty_col, 0), errors="coerce") or 0)
-            recibido = int(pd.to_numeric(row.get("Recibido", 0), errors="coerce") or 0)
-            falt = max(0, pedido - recibido)
-            exc = max(0, recibido - pedido)
-            estado = "Exceso" if exc > 0 else ("Incompleto" if falt > 0 else "Completo")
-            registros.append(
-                {
-                    "SKU": sku,
-                    "Producto": prod,
-                    "Proveedor": prov,
-                    "Cantidad_Ordenada": pedido,
-                    "Recibido": recibido,
-                    "FaltanteEntrega": falt,
-                    "Exceso": exc,
-                    "Estado": estado,
-                }
-            )
+        base = df.loc[edited.index]
+        vals = (
+            edited[[qty_col, "Recibido"]]
+            .apply(pd.to_numeric, errors="coerce")
+            .fillna(0)
+            .to_numpy(dtype=np.int64)
+        )
+        pedido, recibido = vals[:, 0], vals[:, 1]
+        falt = np.maximum(0, pedido - recibido)
+        exc = np.maximum(0, recibido - pedido)
+        estado = np.where(exc > 0, "Exceso", np.where(falt > 0, "Incompleto", "Completo"))
 
-        out_df = pd.DataFrame(registros)
-        RECEPCIONES_DIR.mkdir(parents=True, exist_ok=True)
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        out_csv = RECEPCIONES_DIR / f"recepcion_{ts}.csv"
-        out_df.to_csv(out_csv, sep=";", index=False)
+        def _col_base(*nombres: str) -> pd.Series | str:
+            # Primera columna existente en df entre las variantes de nombre; '-' si no hay
+            for nombre in nombres:
+                if nombre in base.columns:
+                    return base[nombre]
+            return "-"
+
+        out_df = pd.DataFrame(
+            {
+                "SKU": edited["SKU"] if "SKU" in edited.columns else _col_base("SKU"),
+                "Producto": _col_base("Producto", "PRODUCTO"),
+                "Proveedor": _col_base("Proveedor", "PROVEEDOR"),
+                "Cantidad_Ordenada": pedido,
+                "Recibido": recibido,
+                "FaltanteEntrega": falt,
+                "Exceso": exc,
+                "Estado": estado,
+            },
+            index=edited.index,
+        )
+        out_csv = recepcion_mercaderia.guardar_reporte(out_df)
 
         st.success(f"Recepción guardada: {out_csv}")
 
@@ -183,13 +215,17 @@ def recepcion_ui() -> None:
 if page.startswith("Tarea 1"):
     st.header("Tarea 1 · Generar orden al proveedor")
     st.write("Genera el Excel con la cantidad a pedir por SKU (CODPRODUCTO) y proveedor.")
+    split_por_proveedor = st.checkbox("Incluir una hoja por proveedor", value=False, key="split_proveedor")
     if st.button("Generar orden"):
         try:
-            pedidos, inventario = generar_ordenes.cargar_datos()
+            pedidos, inventario = generar_ordenes.cargar_datos(
+                leer_pedidos_cache(_mtime(io_datos.PEDIDOS_FILE)),
+                leer_inventario_cache(_mtime(io_datos.INVENTARIO_FILE)),
+            )
             agrupado = generar_ordenes.preparar_agrupado_pedidos(pedidos)
             faltantes = generar_ordenes.calcular_faltantes(agrupado, inventario)
             faltantes = generar_ordenes.adjuntar_clientes(pedidos, faltantes)
-            out_path = generar_ordenes.guardar_reporte(faltantes)
+            out_path = generar_ordenes.guardar_reporte(faltantes, split_by_proveedor=split_por_proveedor)
             st.success(f"Orden generada en {out_path}")
         except Exception as e:
             st.error(f"Ocurrió un error al generar la orden: {e}")
@@ -207,7 +243,10 @@ else:
     st.write("Calcula faltantes por cliente usando la última recepción guardada.")
     if st.button("Generar reporte de faltantes por cliente"):
         try:
-            out = reporte_faltantes_por_cliente.generar_reporte()
+            out = reporte_faltantes_por_cliente.generar_reporte(
+                leer_pedidos_cache(_mtime(io_datos.PEDIDOS_FILE)),
+                leer_inventario_cache(_mtime(io_datos.INVENTARIO_FILE)),
+            )
             st.success(f"Reporte generado: {out}")
             try:
                 df = pd.read_csv(out, sep=";")